@@ -9,6 +9,7 @@ setup(
         "annotated-types==0.7.0",
         "click==8.1.7",
         "colorama==0.4.6",
+        "orjson==3.10.12",
         "pydantic==2.10.2",
         "pydantic_core==2.27.1",
         "typing_extensions==4.12.2",
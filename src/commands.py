@@ -1,12 +1,20 @@
+from collections.abc import Iterable
+
 import click
 from pydantic import ValidationError
 
 from src.constants import TASK_SERVICE_NAME_IN_CLICK_CONTEXT, DATA_FILE, TaskCategory, TaskStatus
 from src.exceptions import TaskDoesNotExists
-from src.schemas import TaskCreate, TaskUpdate
+from src.schemas import TaskCreate, TaskRead, TaskUpdate
 from src.service import TaskService
 
 
+def _echo_tasks(tasks: Iterable[TaskRead]) -> None:
+    """Print tasks as JSON, one task per line, with a single write."""
+
+    click.echo("\n".join(task.model_dump_json() for task in tasks))
+
+
 @click.group()
 @click.pass_context
 def app(ctx) -> None:
@@ -72,8 +80,7 @@ def get_all(ctx) -> None:
     if not tasks:
         click.echo("There are no tasks.")
     else:
-        for task in tasks:
-            click.echo(task.model_dump())
+        _echo_tasks(tasks)
 
 
 @app.command()
@@ -88,33 +95,41 @@ def get_by_id(ctx, task_id: str) -> None:
     if not task:
         click.echo(f"The task with id '{task_id}' could not be found.")
     else:
-        click.echo(task.model_dump())
+        click.echo(task.model_dump_json())
 
 
 @app.command()
 @click.argument("category")
 @click.pass_context
-def get_by_category(ctx, category: TaskCategory) -> None:
+def get_by_category(ctx, category: str) -> None:
     """Get a sorted list of tasks with specified category value."""
 
+    try:
+        category = TaskCategory(category)
+    except ValueError:
+        click.echo(f"A category must be in {[item.value for item in TaskCategory]}.")
+
+        return
+
     task_service: TaskService = ctx.obj[TASK_SERVICE_NAME_IN_CLICK_CONTEXT]
     tasks = task_service.get_by_category(category)
 
     if not tasks:
-        click.echo(f"There are no tasks with the category '{category}'.")
+        click.echo(f"There are no tasks with the category '{category.value}'.")
     else:
-        for task in tasks:
-            click.echo(task.model_dump())
+        _echo_tasks(tasks)
 
 
 @app.command()
 @click.argument("status")
 @click.pass_context
-def get_by_status(ctx, status: TaskStatus) -> None:
+def get_by_status(ctx, status: str) -> None:
     """Get a sorted list of tasks with specified status value."""
 
-    if status not in [TaskStatus.completed, TaskStatus.not_completed]:
-        click.echo(f"A status must be in {[TaskStatus.completed, TaskStatus.not_completed]}.")
+    try:
+        status = TaskStatus(status)
+    except ValueError:
+        click.echo(f"A status must be in {[item.value for item in TaskStatus]}.")
 
         return
 
@@ -122,27 +137,39 @@ def get_by_status(ctx, status: TaskStatus) -> None:
     tasks = task_service.get_by_status(status)
 
     if not tasks:
-        click.echo(f"There are no tasks with the status '{status}'.")
+        click.echo(f"There are no tasks with the status '{status.value}'.")
     else:
-        for task in tasks:
-            click.echo(task.model_dump())
+        _echo_tasks(tasks)
 
 
 @app.command()
 @click.argument("category")
 @click.argument("status")
 @click.pass_context
-def get_by_category_and_status(ctx, category: TaskCategory, status: TaskStatus) -> None:
+def get_by_category_and_status(ctx, category: str, status: str) -> None:
     """Get a sorted list of tasks with specified category and status values."""
 
+    try:
+        category = TaskCategory(category)
+    except ValueError:
+        click.echo(f"A category must be in {[item.value for item in TaskCategory]}.")
+
+        return
+
+    try:
+        status = TaskStatus(status)
+    except ValueError:
+        click.echo(f"A status must be in {[item.value for item in TaskStatus]}.")
+
+        return
+
     task_service: TaskService = ctx.obj[TASK_SERVICE_NAME_IN_CLICK_CONTEXT]
     tasks = task_service.get_by_category_and_status(category, status)
 
     if not tasks:
-        click.echo(f"There are no tasks with the category '{category}' and status '{status}'.")
+        click.echo(f"There are no tasks with the category '{category.value}' and status '{status.value}'.")
     else:
-        for task in tasks:
-            click.echo(task.model_dump())
+        _echo_tasks(tasks)
 
 
 @app.command()
@@ -163,8 +190,7 @@ def find(ctx, query: str) -> None:
     if not tasks:
         click.echo(f"There are no tasks matching the query '{query}'.")
     else:
-        for task in tasks:
-            click.echo(task.model_dump())
+        _echo_tasks(tasks)
 
 
 @app.command()
@@ -3,6 +3,9 @@ from enum import Enum
 
 DATA_FILE = "tasks.json"
 DATA_FILE_FOR_TESTS = "test_tasks.json"
+LOG_FILE_SUFFIX = ".log"
+LOG_COMPACTION_RATIO = 2
+LOG_COMPACTION_MIN_SIZE = 64 * 1024
 TASK_SERVICE_NAME_IN_CLICK_CONTEXT = "task_service"
 
 
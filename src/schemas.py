@@ -1,6 +1,6 @@
 from datetime import date
 
-from pydantic import BaseModel, ConfigDict, field_validator, model_serializer
+from pydantic import BaseModel, ConfigDict, field_validator
 
 from src.constants import TaskStatus, TaskCategory, TaskPriority
 
@@ -12,7 +12,7 @@ class BaseTaskSchema(BaseModel):
     deadline: date
     priority: TaskPriority
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(revalidate_instances="never", validate_assignment=False, extra="ignore")
 
     @field_validator("name")
     @classmethod
@@ -31,17 +31,10 @@ class TaskRead(BaseTaskSchema):
     id: str
     status: TaskStatus
 
-    @model_serializer()
-    def serialize_model(self):
-        return {
-            "id": self.id,
-            "name": self.name,
-            "description": self.description,
-            "status": self.status.value,
-            "priority": self.priority.value,
-            "category": self.category.value,
-            "deadline": str(self.deadline)
-        }
+    @field_validator("id")
+    @classmethod
+    def validate_id(cls, value: str):
+        return value.lower()
 
 
 class TaskUpdate(BaseModel):
@@ -51,3 +44,11 @@ class TaskUpdate(BaseModel):
     deadline: date | None = None
     priority: TaskPriority | None = None
     status: TaskStatus | None = None
+
+    @field_validator("name")
+    @classmethod
+    def validate_name(cls, value: str | None):
+        if value is not None and not value.strip():
+            raise ValueError("The task must have a name.")
+
+        return value
@@ -1,93 +1,350 @@
-import json
 import os
 import re
 import uuid
-
-from pydantic import BaseModel
-
-from src.constants import TaskStatus, PRIORITY_SORT_ORDER, STATUS_SORT_ORDER, CATEGORY_SORT_ORDER, TaskCategory
+from bisect import bisect_left, insort
+from collections.abc import Sequence
+from functools import cached_property
+from operator import itemgetter
+
+import orjson
+from pydantic import TypeAdapter
+
+from src.constants import (
+    TaskStatus,
+    PRIORITY_SORT_ORDER,
+    STATUS_SORT_ORDER,
+    CATEGORY_SORT_ORDER,
+    TaskCategory,
+    LOG_FILE_SUFFIX,
+    LOG_COMPACTION_RATIO,
+    LOG_COMPACTION_MIN_SIZE
+)
 from src.exceptions import TaskDoesNotExists
 from src.schemas import TaskCreate, TaskRead, TaskUpdate
 
 
-class TaskSchemaEncoder(json.JSONEncoder):
-    """Custom class for converting pydantic models for a task to json"""
+_TASK_LIST_ADAPTER = TypeAdapter(list[TaskRead])
+_WORD_PATTERN = re.compile(r'\w+')
+_TASK_ID_OF_SORT_KEY = itemgetter(-1)
+
+
+def _tokenize(text: str) -> set[str]:
+    """Split a text into a set of lowercased words."""
+
+    return set(_WORD_PATTERN.findall(text.lower()))
+
+
+def _trigrams(text: str) -> set[str]:
+    """Get all the three-character substrings of the words of a text."""
 
-    def default(self, obj):
-        if isinstance(obj, BaseModel):
-            obj = obj.model_dump(exclude_none=True)
-            obj["deadline"] = str(obj["deadline"])
+    return {word[i:i + 3] for word in _tokenize(text) for i in range(len(word) - 2)}
 
-            return obj
 
-        return json.JSONEncoder.default(self, obj)
+def _search_text(task: TaskRead) -> str:
+    """Get the lowercased text of a task that the search is performed on."""
+
+    return f"{task.name} {task.description}".lower()
 
 
 class TaskService:
     def __init__(self, file_name: str):
         """
-        Download data from a file and save it to "self.tasks"
+        Remember the paths to the data files.
+
+        Data is downloaded from the file on the first access to "self.tasks",
+        and each lookup index is built on its first use, so commands only pay
+        for what they need.
 
         ## Attributes ##
         :self.file_name: the relative or absolute path to the file
-        :self.tasks: the list of tasks received from the file.
-        When loading, each task is converted to the pydantic "TaskRead" class
+        :self.log_file_name: the path to the log of changes made since
+        the file was last saved
         """
 
         self.file_name: str = file_name
-        self.tasks: list[TaskRead] = self._load_data(file_name)
+        self.log_file_name: str = file_name + LOG_FILE_SUFFIX
+
+    @cached_property
+    def tasks(self) -> list[TaskRead]:
+        """
+        The list of tasks received from the file, kept sorted by the basic
+        sorting key. When loading, each task is converted to the pydantic
+        "TaskRead" class.
+        """
+
+        return sorted(self._load_data(self.file_name), key=self._basic_sorting_key)
+
+    @cached_property
+    def _sort_keys(self) -> list[tuple]:
+        """The sorting keys of "self.tasks" in the same order."""
+
+        return [self._basic_sorting_key(task) for task in self.tasks]
+
+    @cached_property
+    def _sort_key_by_id(self) -> dict[str, tuple]:
+        """The mapping of a task id to its sorting key."""
+
+        return {task.id: sort_key for task, sort_key in zip(self.tasks, self._sort_keys)}
+
+    @cached_property
+    def _by_id(self) -> dict[str, TaskRead]:
+        """The mapping of a task id to the task."""
+
+        return {task.id: task for task in self.tasks}
+
+    @cached_property
+    def _trigram_index(self) -> dict[str, set[str]]:
+        """
+        The mapping of a lowercased trigram to the ids of tasks whose
+        name or description contains this trigram.
+        """
+
+        trigram_index = {}
+        for task in self.tasks:
+            for trigram in _trigrams(_search_text(task)):
+                trigram_index.setdefault(trigram, set()).add(task.id)
+
+        return trigram_index
+
+    @cached_property
+    def _by_category(self) -> dict[TaskCategory, list[tuple]]:
+        """
+        The mapping of a category to the sorted list of sorting keys
+        of tasks with this category.
+        """
+
+        by_category = {}
+        for task, sort_key in zip(self.tasks, self._sort_keys):
+            by_category.setdefault(task.category, []).append(sort_key)
+
+        return by_category
+
+    @cached_property
+    def _by_status(self) -> dict[TaskStatus, list[tuple]]:
+        """
+        The mapping of a status to the sorted list of sorting keys
+        of tasks with this status.
+        """
+
+        by_status = {}
+        for task, sort_key in zip(self.tasks, self._sort_keys):
+            by_status.setdefault(task.status, []).append(sort_key)
+
+        return by_status
 
     @staticmethod
     def _load_data(file_name: str) -> list[TaskRead]:
         """
         Download data about tasks from a file.
 
-        Converts data about each task into an instance of the "TaskRead" class.
-        If the file does not exist at the specified path, or it is empty, it
-        returns an empty list.
+        The changes recorded in the log file after the last save are applied
+        on top of the file contents. Converts data about each task into an
+        instance of the "TaskRead" class. If the file does not exist at the
+        specified path, or it is empty, it returns an empty list.
         """
 
-        if os.path.exists(file_name):
-            with open(file_name, "r", encoding='utf-8') as file:
-                return [TaskRead.model_validate(task) for task in json.load(file)]
+        tasks = {}
 
-        return []
+        if os.path.exists(file_name):
+            with open(file_name, "rb") as file:
+                tasks = {task.id: task for task in _TASK_LIST_ADAPTER.validate_json(file.read())}
+
+        log_file_name = file_name + LOG_FILE_SUFFIX
+        if os.path.exists(log_file_name):
+            with open(log_file_name, "rb") as file:
+                for line in file:
+                    try:
+                        record = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        # A record may be cut off if the writing process was interrupted.
+                        # The next record always starts on a new line, so only this one is lost.
+                        continue
+
+                    if record["op"] == "delete":
+                        tasks.pop(record["id"], None)
+                    else:
+                        task = TaskRead.model_validate(record["task"])
+                        tasks[task.id] = task
+
+        return list(tasks.values())
 
     @staticmethod
     def _basic_sorting_key(task: TaskRead) -> tuple:
+        """The id comes last, so that the sorting keys of different tasks never coincide."""
+
         return (
             PRIORITY_SORT_ORDER[task.priority],
             STATUS_SORT_ORDER[task.status],
             task.deadline,
             CATEGORY_SORT_ORDER[task.category],
-            task.name
+            task.name,
+            task.id
         )
 
+    def _index(self, task: TaskRead, sort_key: tuple) -> None:
+        """
+        Add a task to the lookup indices.
+
+        Must be called before the task is added to "self.tasks". Only the
+        indices that are already built are updated, the rest will be built
+        from "self.tasks" on their first use.
+        """
+
+        built = self.__dict__
+        task_id = task.id
+
+        if "_sort_key_by_id" in built:
+            self._sort_key_by_id[task_id] = sort_key
+
+        if "_by_id" in built:
+            self._by_id[task_id] = task
+
+        if "_by_category" in built:
+            insort(self._by_category.setdefault(task.category, []), sort_key)
+
+        if "_by_status" in built:
+            insort(self._by_status.setdefault(task.status, []), sort_key)
+
+        if "_trigram_index" in built:
+            for trigram in _trigrams(_search_text(task)):
+                self._trigram_index.setdefault(trigram, set()).add(task_id)
+
+    def _unindex(self, task: TaskRead) -> None:
+        """
+        Remove a task from the lookup indices.
+
+        Must be called while the task is still in "self.tasks". Only the
+        indices that are already built are updated, the rest will be built
+        from "self.tasks" on their first use.
+        """
+
+        built = self.__dict__
+        task_id = task.id
+        sort_key = self._basic_sorting_key(task)
+
+        if "_sort_key_by_id" in built:
+            del self._sort_key_by_id[task_id]
+
+        if "_by_id" in built:
+            del self._by_id[task_id]
+
+        if "_by_category" in built:
+            sort_keys = self._by_category[task.category]
+            del sort_keys[bisect_left(sort_keys, sort_key)]
+
+        if "_by_status" in built:
+            sort_keys = self._by_status[task.status]
+            del sort_keys[bisect_left(sort_keys, sort_key)]
+
+        if "_trigram_index" in built:
+            for trigram in _trigrams(_search_text(task)):
+                task_ids = self._trigram_index[trigram]
+                task_ids.discard(task_id)
+                if not task_ids:
+                    del self._trigram_index[trigram]
+
+    def _insert(self, task: TaskRead) -> None:
+        """Insert a task into "self.tasks" keeping the list sorted."""
+
+        sort_key = self._basic_sorting_key(task)
+        i = bisect_left(self._sort_keys, sort_key)
+        self._index(task, sort_key)
+        self._sort_keys.insert(i, sort_key)
+        self.tasks.insert(i, task)
+
+    def _position(self, task: TaskRead) -> int:
+        """Get the position of a task in "self.tasks"."""
+
+        return bisect_left(self._sort_keys, self._basic_sorting_key(task))
+
+    def _remove(self, task: TaskRead) -> None:
+        """Remove a task from "self.tasks" keeping the list sorted."""
+
+        i = self._position(task)
+        self._unindex(task)
+        del self._sort_keys[i]
+        del self.tasks[i]
+
     def save_data(self) -> None:
         """
         Save the current list of "self.tasks" to a file.
 
-        Completely overwrites the file.
+        Completely overwrites the file. The whole payload is serialized
+        in memory first and then written with a single call to a temporary
+        file, which then replaces the original one. After that, the log of
+        changes is no longer needed and is deleted.
         """
 
-        with open(self.file_name, "w", encoding='utf-8') as file:
-            json.dump(self.tasks, file, ensure_ascii=False, indent=4, cls=TaskSchemaEncoder)
+        data = _TASK_LIST_ADAPTER.dump_json(self.tasks, indent=4)
+        temp_file_name = self.file_name + ".tmp"
+
+        with open(temp_file_name, "wb") as file:
+            file.write(data)
+
+        os.replace(temp_file_name, self.file_name)
+
+        if os.path.exists(self.log_file_name):
+            os.remove(self.log_file_name)
+
+    def _save_change(self, op: str, task: TaskRead) -> None:
+        """
+        Append a single change to the log file.
+
+        Saving a change costs the same regardless of the number of tasks.
+        When the log grows much larger than the file itself, the whole list
+        is saved with "save_data" and the log is started anew.
+        """
+
+        if op == "delete":
+            record = {"op": op, "id": task.id}
+        else:
+            record = {"op": op, "task": task.model_dump()}
+
+        with open(self.log_file_name, "a+b") as file:
+            data = orjson.dumps(record) + b"\n"
+
+            # If the previous write was cut off, start the record on a new line,
+            # so that it is not glued to the broken one.
+            if file.tell() > 0:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    data = b"\n" + data
+
+            file.write(data)
+
+        log_size = os.path.getsize(self.log_file_name)
+        file_size = os.path.getsize(self.file_name) if os.path.exists(self.file_name) else 0
+
+        if log_size > LOG_COMPACTION_RATIO * max(file_size, LOG_COMPACTION_MIN_SIZE):
+            self.save_data()
 
     def add(self, data: TaskCreate, need_save: bool = True) -> TaskRead:
         """Add a new task to the list."""
 
         validated_task = TaskRead(id=str(uuid.uuid4()), status=TaskStatus.not_completed, **data.model_dump())
-        self.tasks.append(validated_task)
+
+        if need_save and "tasks" not in self.__dict__:
+            # The tasks have not been loaded yet, so recording the change is enough.
+            self._save_change("add", validated_task)
+
+            return validated_task
+
+        self._insert(validated_task)
 
         if need_save:
-            self.save_data()
+            self._save_change("add", validated_task)
 
         return validated_task
 
-    def get_all(self) -> list[TaskRead]:
-        """Get a sorted list of all tasks"""
+    def get_all(self, copy: bool = False) -> Sequence[TaskRead]:
+        """
+        Get a sorted list of all tasks.
+
+        The list is kept sorted, so it is returned as is and must not be
+        modified by the caller. Use "copy=True" to get a separate list.
+        """
 
-        return sorted(self.tasks, key=self._basic_sorting_key)
+        return list(self.tasks) if copy else self.tasks
 
     def find(self, query: str) -> list[TaskRead]:
         """
@@ -95,49 +352,76 @@ class TaskService:
         contains one of the specified keywords.
         """
 
-        query = re.sub(r'[^\w\s]', '', query)
-        query = re.sub(r' {2,}', ' ', query)
-        query = query.strip()
+        result = set()
+        for keyword in _tokenize(query):
+            for task_id in self._find_candidates(keyword):
+                if task_id not in result and keyword in _search_text(self._by_id[task_id]):
+                    result.add(task_id)
 
-        keywords = query.split(" ")
-        query = '|'.join(rf'\b{word}\b' for word in keywords)
+        return self._get_sorted(result)
 
-        result = []
-        for task in self.tasks:
-            keywords_in_name = re.findall(query, task.name, re.IGNORECASE)
-            if keywords_in_name:
-                result.append(task)
-                continue
+    def _find_candidates(self, keyword: str) -> set[str] | dict[str, TaskRead]:
+        """
+        Get the ids of tasks that may contain the keyword.
 
-            keywords_in_description = re.findall(query, task.description, re.IGNORECASE)
-            if keywords_in_description:
-                result.append(task)
+        The posting sets of the keyword trigrams are intersected starting
+        from the smallest one. Keywords shorter than a trigram can be
+        anywhere, so all the tasks are candidates for them.
+        """
 
-        return sorted(result, key=self._basic_sorting_key)
+        trigrams = _trigrams(keyword)
+        if not trigrams:
+            return self._by_id
+
+        postings = sorted((self._trigram_index.get(trigram, set()) for trigram in trigrams), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+
+            candidates.intersection_update(posting)
+
+        return candidates
 
     def get_by_id(self, task_id: str) -> TaskRead | None:
         """Get a task by id."""
 
-        for task in self.tasks:
-            if task_id.lower() == task.id.lower():
-                return task
-
-        return None
+        return self._by_id.get(task_id.lower())
 
     def get_by_category(self, category: TaskCategory) -> list[TaskRead] | None:
         """Get a sorted list of tasks by category."""
 
-        return [task for task in self.tasks if category == task.category]
+        return self._get_by_sort_keys(self._by_category.get(category, []))
 
     def get_by_status(self, status: TaskStatus) -> list[TaskRead] | None:
         """Get a sorted list of tasks by status."""
 
-        return [task for task in self.tasks if status == task.status]
+        return self._get_by_sort_keys(self._by_status.get(status, []))
 
     def get_by_category_and_status(self, category: TaskCategory, status: TaskStatus) -> list[TaskRead] | None:
-        """Get a sorted list of tasks by category and status."""
+        """
+        Get a sorted list of tasks by category and status.
 
-        return [task for task in self.tasks if category == task.category and status == task.status]
+        Only the smaller of the category and status lists is scanned.
+        """
+
+        by_category = self._by_category.get(category, [])
+        by_status = self._by_status.get(status, [])
+
+        if len(by_category) <= len(by_status):
+            return [task for task in self._get_by_sort_keys(by_category) if task.status == status]
+
+        return [task for task in self._get_by_sort_keys(by_status) if task.category == category]
+
+    def _get_sorted(self, task_ids: set[str]) -> list[TaskRead]:
+        """Get a sorted list of tasks with the specified ids."""
+
+        return list(map(self._by_id.__getitem__, sorted(task_ids, key=self._sort_key_by_id.__getitem__)))
+
+    def _get_by_sort_keys(self, sort_keys: list[tuple]) -> list[TaskRead]:
+        """Get the tasks with the specified sorting keys in the same order."""
+
+        return list(map(self._by_id.__getitem__, map(_TASK_ID_OF_SORT_KEY, sort_keys)))
 
     def delete(self, task_id: str, need_save: bool = True) -> None:
         """
@@ -151,10 +435,10 @@ class TaskService:
         if not task:
             raise TaskDoesNotExists(task_id)
 
-        self.tasks.remove(task)
+        self._remove(task)
 
         if need_save:
-            self.save_data()
+            self._save_change("delete", task)
 
     def update(self, task_id: str, data: TaskUpdate, need_save: bool = True) -> None:
         """
@@ -164,16 +448,22 @@ class TaskService:
         "TaskDoesNotExists" will be raised.
         """
 
-        for i, task in enumerate(self.tasks):
-            if task_id.lower() == task.id.lower():
-                task_data = task.model_dump()
-                new_data = data.model_dump(exclude_none=True)
-                task_data.update(new_data)
-                self.tasks[i] = TaskRead.model_validate(task_data)
+        task = self.get_by_id(task_id)
+        if not task:
+            raise TaskDoesNotExists(task_id)
 
-                if need_save:
-                    self.save_data()
+        # The CLI passes every option explicitly, so unset ones come as None.
+        changes = {name: value for name in data.model_fields_set if (value := getattr(data, name)) is not None}
+        updated_task = task.model_copy(update=changes)
 
-                return
+        if self._basic_sorting_key(updated_task) == self._basic_sorting_key(task):
+            i = self._position(task)
+            self._unindex(task)
+            self._index(updated_task, self._sort_keys[i])
+            self.tasks[i] = updated_task
+        else:
+            self._remove(task)
+            self._insert(updated_task)
 
-        raise TaskDoesNotExists(task_id)
+        if need_save:
+            self._save_change("update", updated_task)
@@ -7,6 +7,7 @@ from pydantic import ValidationError
 from src.constants import DATA_FILE_FOR_TESTS, TaskStatus, TaskCategory, TaskPriority
 from src.exceptions import TaskDoesNotExists
 from src.schemas import TaskCreate, TaskRead, TaskUpdate
+from src import service
 from src.service import TaskService
 
 
@@ -142,6 +143,12 @@ def test_update_task_does_not_exist(task_service):
         task_service.update("1",  TaskUpdate(status=TaskStatus.completed), need_save=False)
 
 
+@pytest.mark.task_service
+def test_update_failed():
+    with pytest.raises(ValidationError):
+        TaskUpdate(name="  ")
+
+
 @pytest.mark.task_service
 @pytest.mark.parametrize(
     "category, tasks_count",
@@ -228,9 +235,11 @@ def test_delete_task_does_not_exist(task_service):
         ["get task", 9],
         ["tasks", 0],
         ["updated   task", 10],
-        ["get, update", 1],
+        ["get, update", 2],
         ["%get  &  updated!", 2],
-        [" get  ", 1]
+        [" get  ", 1],
+        ["upd", 1],
+        ["ta", 9]
     ]
 )
 def test_find(task_service, query, tasks_count):
@@ -246,3 +255,80 @@ def test_save_data(task_service):
 
     tasks = another_task_service.get_all()
     assert len(tasks) == 10
+
+
+@pytest.mark.task_service
+def test_save_change(tmp_path):
+    file_name = str(tmp_path / DATA_FILE_FOR_TESTS)
+    task_service = TaskService(file_name)
+
+    task = task_service.add(
+        TaskCreate(
+            name="Test log task",
+            description="test log task",
+            category=TaskCategory.study,
+            deadline="2025-01-01",
+            priority=TaskPriority.low
+        )
+    )
+    task_service.update(task.id, TaskUpdate(status=TaskStatus.completed))
+
+    another_task_service = TaskService(file_name)
+    found_task = another_task_service.get_by_id(task.id)
+    assert found_task.status == TaskStatus.completed
+
+    another_task_service.delete(task.id)
+
+    assert len(TaskService(file_name).get_all()) == 0
+
+
+@pytest.mark.task_service
+def test_save_change_after_cut_off_record(tmp_path):
+    file_name = str(tmp_path / DATA_FILE_FOR_TESTS)
+    task_service = TaskService(file_name)
+    task_data = dict(description="test log task", category="work", deadline="2025-01-01", priority="low")
+
+    task_service.add(TaskCreate(name="one", **task_data))
+
+    with open(task_service.log_file_name, "ab") as file:
+        file.write(b'{"op":"add","task":{"id":"x')
+
+    task_service.add(TaskCreate(name="two", **task_data))
+    task_service.add(TaskCreate(name="three", **task_data))
+
+    tasks = TaskService(file_name).get_all()
+    assert sorted(task.name for task in tasks) == ["one", "three", "two"]
+
+
+@pytest.mark.task_service
+def test_save_change_compaction(tmp_path, monkeypatch):
+    monkeypatch.setattr(service, "LOG_COMPACTION_MIN_SIZE", 1024)
+
+    file_name = str(tmp_path / DATA_FILE_FOR_TESTS)
+    task_service = TaskService(file_name)
+    task_data = dict(description="test log task", category="work", deadline="2025-01-01", priority="low")
+
+    for i in range(20):
+        task_service.add(TaskCreate(name=f"Task {i}", **task_data))
+
+    # Only the compaction writes the file itself, every "add" goes to the log.
+    assert os.path.exists(file_name)
+    log_size = os.path.getsize(task_service.log_file_name) if os.path.exists(task_service.log_file_name) else 0
+    assert log_size <= service.LOG_COMPACTION_RATIO * max(os.path.getsize(file_name), 1024)
+
+    assert len(TaskService(file_name).get_all()) == 20
+
+
+@pytest.mark.task_service
+def test_update_does_not_build_unused_indices(tmp_path):
+    file_name = str(tmp_path / DATA_FILE_FOR_TESTS)
+    task_data = dict(description="test lazy task", category="work", deadline="2025-01-01", priority="low")
+    task = TaskService(file_name).add(TaskCreate(name="Test lazy task", **task_data))
+
+    task_service = TaskService(file_name)
+    task_service.update(task.id, TaskUpdate(status=TaskStatus.completed))
+    task_service.delete(task.id)
+
+    assert "_trigram_index" not in task_service.__dict__
+    assert "_by_category" not in task_service.__dict__
+    assert "_by_status" not in task_service.__dict__